@@ -5,13 +5,29 @@ User-friendly interface for processing KMZ files
 """
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox
 import threading
+import queue
 import os
-import re
+import stat
 from pathlib import Path
 from kmz_processor import KMZProcessor
 
+# Log messages are queued from any thread and moved into the log widget in batches
+_LOG_DRAIN_INTERVAL_MS = 50
+_LOG_DRAIN_BATCH_SIZE = 500
+
+# Once the log grows past the max, the oldest lines are dropped down to the trim size
+_LOG_MAX_LINES = 6000
+_LOG_TRIM_TO_LINES = 5000
+
+def _stat_or_none(path):
+    """Return os.stat(path), or None if the path cannot be stat'ed"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
 class KMZProcessorGUI:
     def __init__(self, root):
         self.root = root
@@ -26,10 +42,17 @@ class KMZProcessorGUI:
         self.enable_hover = tk.BooleanVar(value=True)
         self.hover_time = tk.StringVar(value="2")
         self.processing = False
+        self._log_queue = queue.SimpleQueue()
+        self._log_line_count = 0
+        # One processor for every run (it resets its own state); reports through the GUI log
+        self._processor = KMZProcessor(log=self.log_message)
         
         # Setup GUI
         self.setup_gui()
         
+        # Start pumping queued log messages into the log widget
+        self.root.after(_LOG_DRAIN_INTERVAL_MS, self._drain_log)
+        
     def setup_gui(self):
         """Setup the GUI layout"""
         # Main frame
@@ -85,7 +108,10 @@ class KMZProcessorGUI:
         time_frame = ttk.Frame(hover_frame)
         time_frame.grid(row=1, column=1, sticky=tk.W, padx=(0, 20))
         
-        self.hover_time_entry = ttk.Entry(time_frame, textvariable=self.hover_time, width=8, font=("Arial", 9))
+        # Reject anything that is not a number between 0 and 60 as it is typed
+        validate_hover = (self.root.register(self._validate_hover_time), '%P')
+        self.hover_time_entry = ttk.Entry(time_frame, textvariable=self.hover_time, width=8, font=("Arial", 9),
+                                          validate='key', validatecommand=validate_hover)
         self.hover_time_entry.grid(row=0, column=0, padx=(0, 10))
         
         # Quick time buttons
@@ -115,9 +141,20 @@ class KMZProcessorGUI:
         # Log output
         ttk.Label(main_frame, text="Processing Log:").grid(row=7, column=0, sticky=tk.W, pady=(10, 5))
         
-        # Text area for logs
-        self.log_text = scrolledtext.ScrolledText(main_frame, height=15, width=80)
-        self.log_text.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        # Text area for logs - plain Text with its own scrollbars and no undo history
+        log_frame = ttk.Frame(main_frame)
+        log_frame.grid(row=8, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        log_frame.columnconfigure(0, weight=1)
+        log_frame.rowconfigure(0, weight=1)
+        
+        self.log_text = tk.Text(log_frame, height=15, width=80, wrap='none', undo=False, maxundo=0)
+        log_v_scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
+        log_h_scrollbar = ttk.Scrollbar(log_frame, orient=tk.HORIZONTAL, command=self.log_text.xview)
+        self.log_text.configure(yscrollcommand=log_v_scrollbar.set, xscrollcommand=log_h_scrollbar.set)
+        
+        self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        log_v_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        log_h_scrollbar.grid(row=1, column=0, sticky=(tk.W, tk.E))
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -153,36 +190,78 @@ class KMZProcessorGUI:
         """Set hover time from quick buttons"""
         self.hover_time.set(time)
         
+    def _validate_hover_time(self, new_text):
+        """Entry validation: allow empty text or a number from 0 to 60 while typing"""
+        if new_text == '':
+            return True
+        try:
+            return 0 <= float(new_text) <= 60
+        except ValueError:
+            return False
+        
     def toggle_hover_options(self):
         """Enable/disable hover time controls based on checkbox"""
         state = "normal" if self.enable_hover.get() else "disabled"
         self.hover_time_entry.config(state=state)
             
     def log_message(self, message):
-        """Add message to log"""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add message to log (safe to call from any thread)"""
+        self._log_queue.put(message)
+        
+    def _flush_log(self, limit=None):
+        """Insert pending log messages with a single widget update"""
+        lines = []
+        try:
+            while limit is None or len(lines) < limit:
+                lines.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if lines:
+            # Only follow new output if the user has not scrolled up to read earlier lines
+            at_bottom = self.log_text.yview()[1] >= 0.999
+            
+            text = '\n'.join(lines) + '\n'
+            self.log_text.insert(tk.END, text)
+            self._log_line_count += text.count('\n')
+            
+            # Trim only the oldest lines so the widget never has to be rebuilt
+            if self._log_line_count > _LOG_MAX_LINES:
+                excess = self._log_line_count - _LOG_TRIM_TO_LINES
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+                self._log_line_count = _LOG_TRIM_TO_LINES
+                
+            if at_bottom:
+                self.log_text.see(tk.END)
+            
+    def _drain_log(self):
+        """Periodically move queued log messages into the log widget"""
+        self._flush_log(_LOG_DRAIN_BATCH_SIZE)
+        self.root.after(_LOG_DRAIN_INTERVAL_MS, self._drain_log)
         
     def process_kmz(self):
         """Process the KMZ file"""
         if self.processing:
             return
             
-        # Validate inputs
-        if not self.input_file.get():
+        # Validate inputs (one stat per path)
+        input_file = self.input_file.get()
+        if not input_file:
             messagebox.showerror("Error", "Please select an input KMZ file")
             return
             
-        if not os.path.exists(self.input_file.get()):
+        input_stat = _stat_or_none(input_file)
+        if input_stat is None or not stat.S_ISREG(input_stat.st_mode):
             messagebox.showerror("Error", "Input file does not exist")
             return
             
-        if not self.output_dir.get():
+        output_dir = self.output_dir.get()
+        if not output_dir:
             messagebox.showerror("Error", "Please select an output directory")
             return
             
-        if not os.path.exists(self.output_dir.get()):
+        output_dir_stat = _stat_or_none(output_dir)
+        if output_dir_stat is None or not stat.S_ISDIR(output_dir_stat.st_mode):
             messagebox.showerror("Error", "Output directory does not exist")
             return
             
@@ -196,20 +275,16 @@ class KMZProcessorGUI:
             messagebox.showerror("Error", "Output filename must end with .kmz")
             return
         
-        # Validate hover time if hover is enabled
+        # Validate hover time if hover is enabled (the entry only accepts 0-60 or empty)
         if self.enable_hover.get():
-            try:
-                hover_time = float(self.hover_time.get())
-                if hover_time <= 0 or hover_time > 60:
-                    messagebox.showerror("Error", "Hover time must be between 0.1 and 60 seconds")
-                    return
-            except ValueError:
-                messagebox.showerror("Error", "Hover time must be a valid number")
+            hover_text = self.hover_time.get()
+            if not hover_text or float(hover_text) <= 0:
+                messagebox.showerror("Error", "Hover time must be between 0.1 and 60 seconds")
                 return
         
         # Check if output file already exists
-        output_path = os.path.join(self.output_dir.get(), filename)
-        if os.path.exists(output_path):
+        output_path = os.path.join(output_dir, filename)
+        if _stat_or_none(output_path) is not None:
             response = messagebox.askyesno(
                 "File Exists", 
                 f"The file '{filename}' already exists in the output directory.\n\n"
@@ -224,6 +299,7 @@ class KMZProcessorGUI:
         self.process_button.config(state="disabled")
         self.progress.start()
         self.log_text.delete(1.0, tk.END)
+        self._log_line_count = 0
         
         # Start processing thread
         thread = threading.Thread(target=self._process_kmz_thread)
@@ -236,30 +312,15 @@ class KMZProcessorGUI:
             self.log_message("🚁 Starting KMZ Processing Workflow")
             self.log_message("=" * 50)
             
-            # Create processor
-            processor = KMZProcessor()
-            
             # Process the file with custom filename and hover options
             hover_enabled = self.enable_hover.get()
             hover_time = float(self.hover_time.get()) if hover_enabled else 0
             
-            # Override the print function to log to GUI
-            import builtins
-            original_print = builtins.print
-            def gui_print(*args, **kwargs):
-                message = ' '.join(str(arg) for arg in args)
-                self.root.after(0, lambda: self.log_message(message))
-            builtins.print = gui_print
-            
-            try:
-                output_path = processor.process_kmz(self.input_file.get(), self.output_dir.get(), 
+            mission = self._processor.process_kmz(self.input_file.get(), self.output_dir.get(), 
                                                   self.output_filename.get(), hover_enabled, hover_time)
-            finally:
-                # Restore original print function
-                builtins.print = original_print
             
-            if output_path:
-                self.root.after(0, lambda: self._processing_complete(True, output_path))
+            if mission:
+                self.root.after(0, lambda: self._processing_complete(True, mission))
             else:
                 self.root.after(0, lambda: self._processing_complete(False, None))
                 
@@ -272,53 +333,49 @@ class KMZProcessorGUI:
         self.process_button.config(state="normal")
         self.progress.stop()
         
+        # Make sure everything the worker logged is shown before the summary
+        self._flush_log()
+        
         if success:
             # Add important summary at the top
             self.log_message("\n" + "="*60)
             self.log_message("📊 MISSION SUMMARY")
             self.log_message("="*60)
             
-            # Extract key info from the log (we'll need to parse it)
-            self._add_mission_summary()
+            # Summarize the stats the processor returned
+            self._add_mission_summary(result)
             
+            output_path = result.output_path
             self.log_message("\n🎉 SUCCESS!")
             self.log_message(f"📁 Input:  {self.input_file.get()}")
-            self.log_message(f"📁 Output: {result}")
+            self.log_message(f"📁 Output: {output_path}")
             self.log_message("🔗 All waypoints now have hover + photo actions!")
             
-            self.status_var.set(f"Success! Output saved to: {os.path.basename(result)}")
+            self.status_var.set(f"Success! Output saved to: {os.path.basename(output_path)}")
+            self._flush_log()
             
             # Ask if user wants to open output directory
             if messagebox.askyesno("Success", 
-                                 f"KMZ processed successfully!\n\nOutput: {os.path.basename(result)}\n\nOpen output directory?"):
-                os.startfile(os.path.dirname(result))
+                                 f"KMZ processed successfully!\n\nOutput: {os.path.basename(output_path)}\n\nOpen output directory?"):
+                os.startfile(os.path.dirname(output_path))
         else:
             error_msg = str(result) if result else "Unknown error occurred"
             self.log_message(f"\n❌ FAILED: {error_msg}")
             self.status_var.set("Processing failed")
+            self._flush_log()
             messagebox.showerror("Error", f"Failed to process KMZ file:\n\n{error_msg}")
     
-    def _add_mission_summary(self):
+    def _add_mission_summary(self, mission):
         """Add a summary of the most important mission information"""
         try:
-            # Get the log content to extract key information
-            log_content = self.log_text.get(1.0, tk.END)
-            
-            # Extract waypoint count
-            waypoint_match = re.search(r'Found (\d+) waypoints', log_content)
-            waypoint_count = waypoint_match.group(1) if waypoint_match else "Unknown"
-            
-            # Extract distance
-            distance_match = re.search(r'Total distance: ([\d,]+\.?\d*) meters', log_content)
-            distance = distance_match.group(1) if distance_match else "Unknown"
-            
-            # Extract total mission time
-            time_match = re.search(r'Total mission time: (\d+m \d+s)', log_content)
-            mission_time = time_match.group(1) if time_match else "Unknown"
-            
-            # Extract battery usage
-            battery_match = re.search(r'Estimated battery usage: ~(\d+)%', log_content)
-            battery_usage = battery_match.group(1) if battery_match else "Unknown"
+            # Format the values returned by the processor; missing stats show as Unknown
+            waypoint_count = mission.waypoints if mission.waypoints is not None else "Unknown"
+            distance = f"{mission.distance_m:.1f}" if mission.distance_m is not None else "Unknown"
+            if mission.mission_time_s is not None:
+                mission_time = f"{mission.mission_time_s // 60}m {mission.mission_time_s % 60}s"
+            else:
+                mission_time = "Unknown"
+            battery_usage = mission.battery_pct if mission.battery_pct is not None else "Unknown"
             
             # Extract hover settings
             hover_enabled = self.enable_hover.get()
@@ -348,9 +405,9 @@ def main():
     
     # Center window
     root.update_idletasks()
-    x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
-    y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
-    root.geometry(f"+{x}+{y}")
+    screen_w, screen_h = root.winfo_screenwidth(), root.winfo_screenheight()
+    win_w, win_h = root.winfo_width(), root.winfo_height()
+    root.geometry(f"+{(screen_w - win_w) // 2}+{(screen_h - win_h) // 2}")
     
     root.mainloop()
 
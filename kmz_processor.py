@@ -5,21 +5,115 @@ Handles the entire pipeline from KMZ input to processed KMZ output
 """
 
 import os
+import sys
+import re
+import itertools
 import zipfile
 import shutil
-import uuid
-import tempfile
-from pathlib import Path
-import xml.etree.ElementTree as ET
+import struct
+import copy
+import math
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass
+class MissionResult:
+    """Result of a successful KMZ processing run; mission stats are None when unknown"""
+    output_path: str
+    waypoints: Optional[int] = None
+    distance_m: Optional[float] = None
+    mission_time_s: Optional[int] = None
+    battery_pct: Optional[int] = None
+
+# Progress messages go to this logger unless a log callable is passed in
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
 
 class KMZProcessor:
-    def __init__(self):
-        self.temp_dir = None
+    # Buffer size for streaming untouched members into the output KMZ
+    COPY_BUFFER_SIZE = 1 << 20
+    
+    # Missions that already contain this action are left untouched
+    HOVER_MARKER = b'<wpml:actionActuatorFunc>hover</wpml:actionActuatorFunc>'
+    
+    # Action groups are inserted right after each occurrence of this exact text
+    INSERTION_MARKER = b'<wpml:useStraightLine>0</wpml:useStraightLine>'
+    
+    # Single scan over the WPML: every waypoint gets one action group, inserted right
+    # after its insertion marker; coordinates ("lon,lat[,alt]") are captured in
+    # group 1 for the mission time estimate
+    WAYPOINT_SCAN_RE = re.compile(re.escape(INSERTION_MARKER) + rb'|<coordinates>([^<]+)</coordinates>')
+    
+    # Action group templates (bytes, printf-style): every %d is the action group ID
+    # (also the waypoint index), the hover template's %s is the encoded hover time
+    HOVER_PHOTO_ACTION_BLOCK = b'''<!-- Action Group for Waypoint: %d's Actions -->
+<wpml:actionGroup>
+<wpml:actionGroupId>%d</wpml:actionGroupId>
+<wpml:actionGroupStartIndex>%d</wpml:actionGroupStartIndex>
+<wpml:actionGroupEndIndex>%d</wpml:actionGroupEndIndex>
+<wpml:actionGroupMode>sequence</wpml:actionGroupMode>
+<wpml:actionTrigger>
+<wpml:actionTriggerType>reachPoint</wpml:actionTriggerType>
+</wpml:actionTrigger>
+<wpml:action>
+<wpml:actionId>0</wpml:actionId>
+<wpml:actionActuatorFunc>hover</wpml:actionActuatorFunc>
+<wpml:actionActuatorFuncParam>
+<wpml:hoverTime>%s</wpml:hoverTime>
+</wpml:actionActuatorFuncParam>
+</wpml:action>
+<wpml:action>
+<wpml:actionId>1</wpml:actionId>
+<wpml:actionActuatorFunc>takePhoto</wpml:actionActuatorFunc>
+<wpml:actionActuatorFuncParam>
+<wpml:payloadPositionIndex>0</wpml:payloadPositionIndex>
+<wpml:fileSuffix/>
+<wpml:useGlobalPayloadLensIndex>0</wpml:useGlobalPayloadLensIndex>
+</wpml:actionActuatorFuncParam>
+</wpml:action>
+</wpml:actionGroup>'''
+    
+    PHOTO_ACTION_BLOCK = b'''<!-- Action Group for Waypoint: %d's Actions -->
+<wpml:actionGroup>
+<wpml:actionGroupId>%d</wpml:actionGroupId>
+<wpml:actionGroupStartIndex>%d</wpml:actionGroupStartIndex>
+<wpml:actionGroupEndIndex>%d</wpml:actionGroupEndIndex>
+<wpml:actionGroupMode>sequence</wpml:actionGroupMode>
+<wpml:actionTrigger>
+<wpml:actionTriggerType>reachPoint</wpml:actionTriggerType>
+</wpml:actionTrigger>
+<wpml:action>
+<wpml:actionId>0</wpml:actionId>
+<wpml:actionActuatorFunc>takePhoto</wpml:actionActuatorFunc>
+<wpml:actionActuatorFuncParam>
+<wpml:payloadPositionIndex>0</wpml:payloadPositionIndex>
+<wpml:fileSuffix/>
+<wpml:useGlobalPayloadLensIndex>0</wpml:useGlobalPayloadLensIndex>
+</wpml:actionActuatorFuncParam>
+</wpml:action>
+</wpml:actionGroup>'''
+    
+    # Deflate level for the rewritten WPML; text compresses well even at level 1
+    WPML_COMPRESSLEVEL = 1
+    
+    # Archives smaller than this (uncompressed) are written without deflate;
+    # for a few tens of KB the zlib work outweighs the bytes it saves
+    STORED_ARCHIVE_THRESHOLD = 256 * 1024
+    
+    # Media that deflate cannot shrink; stored rather than re-deflated when a member has to be re-encoded
+    INCOMPRESSIBLE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.mp4', '.mov', '.dng', '.heic'})
+    
+    def __init__(self, log=logger.info):
+        # Callable that receives each progress message (the module logger by default)
+        self.log = log
         self.original_kmz_path = None
-        self.work_dir = None
         self.wpmz_dir = None
-        self.template_kml_path = None
-        self.waylines_wpml_path = None
+        self.template_kml_name = None
+        self.waylines_wpml_name = None
+        self.processed_wpml_bytes = None
+        self.waypoint_count = None
+        self.mission_estimate = None
         
     def process_kmz(self, input_kmz_path, output_dir=None, output_filename=None, enable_hover=True, hover_time=2.0):
         """
@@ -33,311 +127,230 @@ class KMZProcessor:
             hover_time: Hover duration in seconds (default: 2.0)
         
         Returns:
-            Path to processed KMZ file
+            MissionResult with the processed KMZ path and mission stats, or None on failure
         """
+        self.processed_wpml_bytes = None
+        self.waypoint_count = None
+        self.mission_estimate = None
+        
         try:
-            print("🚁 Starting KMZ Processing Workflow")
-            print("=" * 50)
+            self.log("🚁 Starting KMZ Processing Workflow")
+            self.log("=" * 50)
             
             # Step 1: Validate input file
             if not self._validate_input(input_kmz_path):
                 return None
                 
-            # Step 2: Create temporary workspace
-            if not self._setup_workspace(input_kmz_path):
-                return None
-                
-            # Step 3: Extract KMZ (treat as ZIP)
-            if not self._extract_kmz():
-                return None
-                
-            # Step 4: Find and validate WPML structure
+            # Step 2: Find and validate WPML structure (KMZ is read as ZIP, nothing is extracted)
             if not self._find_wpml_files():
                 return None
                 
-            # Step 5: Process WPML file (add hover + photo actions)
+            # Step 3: Process WPML file in memory (add hover + photo actions)
             if not self._process_wpml(enable_hover, hover_time):
                 return None
                 
-            # Step 6: Create new KMZ with processed WPML
+            # Step 4: Create new KMZ with processed WPML
             output_path = self._create_output_kmz(output_dir, output_filename)
             
-            # Step 7: Cleanup
-            self._cleanup()
-            
             if output_path:
-                print(f"✅ Success! Processed KMZ saved to: {output_path}")
-                return output_path
+                self.log(f"✅ Success! Processed KMZ saved to: {output_path}")
+                distance_m, mission_time_s, battery_pct = self.mission_estimate or (None, None, None)
+                return MissionResult(output_path, self.waypoint_count, distance_m, mission_time_s, battery_pct)
             else:
-                print("❌ Failed to create output KMZ")
+                self.log("❌ Failed to create output KMZ")
                 return None
                 
         except Exception as e:
-            print(f"❌ Error during processing: {str(e)}")
-            self._cleanup()
+            self.log(f"❌ Error during processing: {str(e)}")
             return None
     
     def _validate_input(self, input_path):
         """Validate input KMZ file"""
-        print("📋 Step 1: Validating input file...")
+        self.log("📋 Step 1: Validating input file...")
         
         if not os.path.exists(input_path):
-            print(f"❌ Input file not found: {input_path}")
+            self.log(f"❌ Input file not found: {input_path}")
             return False
             
         if not input_path.lower().endswith('.kmz'):
-            print(f"❌ Input file must be .kmz: {input_path}")
+            self.log(f"❌ Input file must be .kmz: {input_path}")
             return False
             
         file_size = os.path.getsize(input_path)
         if file_size == 0:
-            print(f"❌ Input file is empty: {input_path}")
+            self.log(f"❌ Input file is empty: {input_path}")
             return False
             
-        print(f"✅ Input file valid: {file_size:,} bytes")
+        self.log(f"✅ Input file valid: {file_size:,} bytes")
         self.original_kmz_path = input_path
         return True
     
-    def _setup_workspace(self, input_path):
-        """Create temporary workspace"""
-        print("📁 Step 2: Setting up workspace...")
-        
-        try:
-            # Create temp directory
-            self.temp_dir = tempfile.mkdtemp(prefix="kmz_processor_")
-            self.work_dir = os.path.join(self.temp_dir, "work")
-            os.makedirs(self.work_dir, exist_ok=True)
-            
-            print(f"✅ Workspace created: {self.temp_dir}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to create workspace: {str(e)}")
-            return False
-    
-    def _extract_kmz(self):
-        """Extract KMZ file (treat as ZIP)"""
-        print("📦 Step 3: Extracting KMZ file...")
+    def _find_wpml_files(self):
+        """Find and validate WPML files inside the KMZ archive"""
+        self.log("🔍 Step 2: Finding WPML files...")
         
         try:
             with zipfile.ZipFile(self.original_kmz_path, 'r') as zip_ref:
-                zip_ref.extractall(self.work_dir)
+                members = {zinfo.filename: zinfo for zinfo in zip_ref.infolist()}
             
-            print("✅ KMZ extracted successfully")
-            return True
+            # Look for wpmz folder - typically at the archive root, so check that first
+            if any(name.startswith('wpmz/') for name in members):
+                self.wpmz_dir = 'wpmz'
+            else:
+                # Otherwise use the first nested wpmz folder found
+                self.wpmz_dir = next((name[:name.index('/wpmz/') + len('/wpmz')]
+                                      for name in members if '/wpmz/' in name), None)
             
-        except zipfile.BadZipFile:
-            print("❌ Invalid KMZ file - not a valid ZIP archive")
-            return False
-        except Exception as e:
-            print(f"❌ Failed to extract KMZ: {str(e)}")
-            return False
-    
-    def _find_wpml_files(self):
-        """Find and validate WPML files in extracted structure"""
-        print("🔍 Step 4: Finding WPML files...")
-        
-        try:
-            # Look for wpmz folder
-            wpmz_candidates = []
-            for root, dirs, files in os.walk(self.work_dir):
-                if 'wpmz' in dirs:
-                    wpmz_candidates.append(os.path.join(root, 'wpmz'))
-            
-            if not wpmz_candidates:
-                print("❌ No 'wpmz' folder found in extracted KMZ")
+            if self.wpmz_dir is None:
+                self.log("❌ No 'wpmz' folder found in KMZ")
                 return False
             
-            # Use the first wpmz folder found
-            self.wpmz_dir = wpmz_candidates[0]
-            print(f"✅ Found wpmz folder: {self.wpmz_dir}")
+            self.log(f"✅ Found wpmz folder: {self.wpmz_dir}")
             
             # Look for required files
-            template_kml = os.path.join(self.wpmz_dir, "template.kml")
-            waylines_wpml = os.path.join(self.wpmz_dir, "waylines.wpml")
+            template_kml = f"{self.wpmz_dir}/template.kml"
+            waylines_wpml = f"{self.wpmz_dir}/waylines.wpml"
             
-            if not os.path.exists(template_kml):
-                print("❌ template.kml not found in wpmz folder")
+            if template_kml not in members:
+                self.log("❌ template.kml not found in wpmz folder")
                 return False
                 
-            if not os.path.exists(waylines_wpml):
-                print("❌ waylines.wpml not found in wpmz folder")
+            if waylines_wpml not in members:
+                self.log("❌ waylines.wpml not found in wpmz folder")
                 return False
             
-            self.template_kml_path = template_kml
-            self.waylines_wpml_path = waylines_wpml
+            self.template_kml_name = template_kml
+            self.waylines_wpml_name = waylines_wpml
             
-            print("✅ Found required files:")
-            print(f"   - template.kml: {os.path.getsize(template_kml):,} bytes")
-            print(f"   - waylines.wpml: {os.path.getsize(waylines_wpml):,} bytes")
+            self.log("✅ Found required files:")
+            self.log(f"   - template.kml: {members[template_kml].file_size:,} bytes")
+            self.log(f"   - waylines.wpml: {members[waylines_wpml].file_size:,} bytes")
             
             return True
             
+        except zipfile.BadZipFile:
+            self.log("❌ Invalid KMZ file - not a valid ZIP archive")
+            return False
         except Exception as e:
-            print(f"❌ Failed to find WPML files: {str(e)}")
+            self.log(f"❌ Failed to find WPML files: {str(e)}")
             return False
     
     def _process_wpml(self, enable_hover=True, hover_time=2.0):
         """Process WPML file to add hover and photo actions"""
-        print("⚙️ Step 5: Processing WPML file...")
+        self.log("⚙️ Step 3: Processing WPML file...")
         
         try:
-            # Read the WPML file
-            with open(self.waylines_wpml_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Read the WPML file straight from the archive; all markers are ASCII,
+            # so it is processed as bytes without a decode/encode round trip
+            with zipfile.ZipFile(self.original_kmz_path, 'r') as zip_ref:
+                content = zip_ref.read(self.waylines_wpml_name)
             
-            # Check if it's already processed
-            if '<wpml:actionActuatorFunc>hover</wpml:actionActuatorFunc>' in content:
-                print("⚠️  WPML file already contains hover actions")
+            # Check if it's already processed (find stops at the first hit)
+            if content.find(self.HOVER_MARKER) != -1:
+                self.log("⚠️  WPML file already contains hover actions")
                 return True
             
-            # Count waypoints
-            waypoint_count = content.count('<Placemark>')
-            insertion_points = content.count('<wpml:useStraightLine>0</wpml:useStraightLine>')
+            # Process the file in one pass, collecting coordinates along the way;
+            # the counts it returns double as the compatibility check
+            processed_content, insertion_points, coordinates = self._add_hover_photo_actions(
+                content, enable_hover, hover_time)
             
-            print(f"📊 Found {waypoint_count} waypoints, {insertion_points} insertion points")
+            if processed_content is None:
+                self.log("❌ Failed to process WPML content")
+                return False
+            
+            # Every waypoint has one <coordinates> element
+            self.log(f"📊 Found {len(coordinates)} waypoints, {insertion_points} insertion points")
+            self.waypoint_count = len(coordinates)
             
             if insertion_points == 0:
-                print("❌ No insertion points found - WPML not compatible")
+                self.log("❌ No insertion points found - WPML not compatible")
                 return False
             
             # Show processing options
             if enable_hover:
-                print(f"🎯 Adding hover ({hover_time}s) + photo actions to all waypoints")
+                self.log(f"🎯 Adding hover ({hover_time}s) + photo actions to all waypoints")
             else:
-                print("📸 Adding photo actions only to all waypoints")
+                self.log("📸 Adding photo actions only to all waypoints")
             
             # Estimate mission time
-            self._estimate_mission_time(content, enable_hover, hover_time)
-            
-            # Process the file using our existing logic
-            processed_content = self._add_hover_photo_actions(content, enable_hover, hover_time)
-            
-            if not processed_content:
-                print("❌ Failed to process WPML content")
-                return False
+            self._estimate_mission_time(coordinates, enable_hover, hover_time)
             
-            # Write processed content back
-            with open(self.waylines_wpml_path, 'w', encoding='utf-8') as f:
-                f.write(processed_content)
+            # Keep processed content in memory for the output KMZ
+            self.processed_wpml_bytes = processed_content
             
-            print("✅ WPML file processed successfully")
+            self.log("✅ WPML file processed successfully")
             return True
             
         except Exception as e:
-            print(f"❌ Failed to process WPML: {str(e)}")
+            self.log(f"❌ Failed to process WPML: {str(e)}")
             return False
     
     def _add_hover_photo_actions(self, content, enable_hover=True, hover_time=2.0):
-        """Add hover and photo actions to WPML content"""
+        """Add hover and photo actions to WPML content
+        
+        Returns:
+            Tuple of (processed content, number of action groups inserted, waypoint coordinates)
+        """
         try:
-            lines = content.split('\n')
-            new_lines = []
-            action_group_id = 0
-            
-            for i, line in enumerate(lines):
-                new_lines.append(line)
-                
-                # Look for insertion point
-                if '<wpml:useStraightLine>0</wpml:useStraightLine>' in line:
-                    # Generate action block based on options
-                    if enable_hover:
-                        # Hover + Photo actions
-                        action_block = f'''<!-- Action Group for Waypoint: {action_group_id}'s Actions -->
-<wpml:actionGroup>
-<wpml:actionGroupId>{action_group_id}</wpml:actionGroupId>
-<wpml:actionGroupStartIndex>{action_group_id}</wpml:actionGroupStartIndex>
-<wpml:actionGroupEndIndex>{action_group_id}</wpml:actionGroupEndIndex>
-<wpml:actionGroupMode>sequence</wpml:actionGroupMode>
-<wpml:actionTrigger>
-<wpml:actionTriggerType>reachPoint</wpml:actionTriggerType>
-</wpml:actionTrigger>
-<wpml:action>
-<wpml:actionId>0</wpml:actionId>
-<wpml:actionActuatorFunc>hover</wpml:actionActuatorFunc>
-<wpml:actionActuatorFuncParam>
-<wpml:hoverTime>{hover_time}</wpml:hoverTime>
-</wpml:actionActuatorFuncParam>
-</wpml:action>
-<wpml:action>
-<wpml:actionId>1</wpml:actionId>
-<wpml:actionActuatorFunc>takePhoto</wpml:actionActuatorFunc>
-<wpml:actionActuatorFuncParam>
-<wpml:payloadPositionIndex>0</wpml:payloadPositionIndex>
-<wpml:fileSuffix/>
-<wpml:useGlobalPayloadLensIndex>0</wpml:useGlobalPayloadLensIndex>
-</wpml:actionActuatorFuncParam>
-</wpml:action>
-</wpml:actionGroup>'''
-                    else:
-                        # Photo action only
-                        action_block = f'''<!-- Action Group for Waypoint: {action_group_id}'s Actions -->
-<wpml:actionGroup>
-<wpml:actionGroupId>{action_group_id}</wpml:actionGroupId>
-<wpml:actionGroupStartIndex>{action_group_id}</wpml:actionGroupStartIndex>
-<wpml:actionGroupEndIndex>{action_group_id}</wpml:actionGroupEndIndex>
-<wpml:actionGroupMode>sequence</wpml:actionGroupMode>
-<wpml:actionTrigger>
-<wpml:actionTriggerType>reachPoint</wpml:actionTriggerType>
-</wpml:actionTrigger>
-<wpml:action>
-<wpml:actionId>0</wpml:actionId>
-<wpml:actionActuatorFunc>takePhoto</wpml:actionActuatorFunc>
-<wpml:actionActuatorFuncParam>
-<wpml:payloadPositionIndex>0</wpml:payloadPositionIndex>
-<wpml:fileSuffix/>
-<wpml:useGlobalPayloadLensIndex>0</wpml:useGlobalPayloadLensIndex>
-</wpml:actionActuatorFuncParam>
-</wpml:action>
-</wpml:actionGroup>'''
-                    
-                    new_lines.append(action_block)
-                    action_group_id += 1
-            
-            return '\n'.join(new_lines)
+            if enable_hover:
+                template, extra_args = self.HOVER_PHOTO_ACTION_BLOCK, (str(hover_time).encode('ascii'),)
+            else:
+                template, extra_args = self.PHOTO_ACTION_BLOCK, ()
+            counter = itertools.count()
+            coordinates = []
+            
+            def insert_action_block(match):
+                coord_str = match.group(1)
+                if coord_str is not None:
+                    # Coordinates are only collected; the text stays as it is
+                    coordinates.append(coord_str)
+                    return match.group(0)
+                # Action group IDs follow insertion order, one group per waypoint
+                i = next(counter)
+                return match.group(0) + b'\n' + template % ((i, i, i, i) + extra_args)
+            
+            processed_content = self.WAYPOINT_SCAN_RE.sub(insert_action_block, content)
+            # The counter has handed out one ID per inserted group, so its next value is the count
+            return processed_content, next(counter), coordinates
             
         except Exception as e:
-            print(f"❌ Error adding actions: {str(e)}")
-            return None
+            self.log(f"❌ Error adding actions: {str(e)}")
+            return None, 0, []
     
-    def _estimate_mission_time(self, content, enable_hover, hover_time):
-        """Estimate total mission time from first to last waypoint"""
+    def _estimate_mission_time(self, coordinates, enable_hover, hover_time):
+        """Estimate total mission time from first to last waypoint
+        
+        coordinates holds the raw <coordinates> text of each waypoint, in order.
+        
+        Stores (distance in meters, mission time in seconds, battery %) in
+        self.mission_estimate when the estimate succeeds.
+        """
         try:
-            import re
-            from math import sqrt, atan2, cos, sin, radians
-            
-            # Find all waypoint coordinates
-            coord_pattern = r'<coordinates>([^<]+)</coordinates>'
-            coordinates = re.findall(coord_pattern, content)
-            
             if len(coordinates) < 2:
-                print("⚠️  Not enough waypoints for time estimation")
+                self.log("⚠️  Not enough waypoints for time estimation")
                 return
             
             # Parse coordinates (longitude, latitude, altitude)
             waypoints = []
             for coord_str in coordinates:
-                # Split by spaces and take first coordinate (some have multiple)
-                coords = coord_str.strip().split()
-                if coords:
-                    coord_parts = coords[0].split(',')
-                    if len(coord_parts) >= 3:
-                        lon, lat, alt = map(float, coord_parts[:3])
-                        waypoints.append((lon, lat, alt))
-                    elif len(coord_parts) == 2:
-                        # Some coordinates might only have lon, lat without altitude
-                        lon, lat = map(float, coord_parts)
-                        waypoints.append((lon, lat, 0))  # Default altitude to 0
+                # Split by whitespace and take first coordinate (some have multiple)
+                coords = coord_str.split(None, 1)
+                if not coords:
+                    continue
+                lon, sep, rest = coords[0].partition(b',')
+                if not sep:
+                    continue
+                lat, _, alt = rest.partition(b',')
+                # Some coordinates might only have lon, lat without altitude
+                waypoints.append((float(lon), float(lat), float(alt.partition(b',')[0]) if alt else 0))
             
             if len(waypoints) < 2:
-                print("⚠️  Invalid waypoint coordinates")
+                self.log("⚠️  Invalid waypoint coordinates")
                 return
             
-            # Calculate total distance
-            total_distance = 0
-            for i in range(1, len(waypoints)):
-                dist = self._calculate_distance(waypoints[i-1], waypoints[i])
-                total_distance += dist
+            # Calculate total distance over consecutive waypoint pairs in one pass
+            total_distance = sum(map(self._calculate_distance, waypoints, itertools.islice(waypoints, 1, None)))
             
             # Estimate flight time based on real DJI Air 3S waypoint mission data
             # Your actual data: 245m in 5m12s = 0.79 m/s effective speed
@@ -354,7 +367,6 @@ class KMZProcessor:
             # Mathematical model based on real flight data
             # Fitting curve: speed = 0.10 * distance^0.85 + 0.20
             # This gives: 3.46m→0.40m/s, 5.16m→0.59m/s, 7.0m→0.79m/s
-            import math
             base_speed = 0.10 * (avg_distance_per_waypoint ** 0.85) + 0.20
             
             # Add safety buffer for very tight waypoints (under 4m per waypoint)
@@ -391,57 +403,60 @@ class KMZProcessor:
             total_minutes = int(total_mission_time // 60)
             total_seconds = int(total_mission_time % 60)
             
-            print(f"\n📊 Mission Time Estimation:")
-            print(f"   • Total distance: {total_distance:.1f} meters ({total_distance/1000:.2f} km)")
-            print(f"   • Flight time: {flight_time:.1f} seconds ({flight_time/60:.1f} minutes)")
-            print(f"     - Travel time: {total_distance/effective_speed_ms:.1f}s at {effective_speed_ms} m/s")
-            print(f"     - Waypoint count: {waypoint_count} waypoints")
-            print(f"   • Action time: {total_action_time:.1f} seconds ({total_action_time/60:.1f} minutes)")
-            print(f"   • Total mission time: {total_minutes}m {total_seconds}s")
-            
             # Battery estimation for DJI Air 3S
             # Based on real data: 8m2s used 22% battery → 2.75% per minute
             battery_percentage = (total_mission_time / 60) * 2.75  # 2.75% per minute
-            print(f"   • Estimated battery usage: ~{min(battery_percentage, 100):.0f}% (DJI Air 3S)")
+            
+            # Report the whole estimate as a single log message
+            self.log(f"\n📊 Mission Time Estimation:\n"
+                     f"   • Total distance: {total_distance:.1f} meters ({total_distance/1000:.2f} km)\n"
+                     f"   • Flight time: {flight_time:.1f} seconds ({flight_time/60:.1f} minutes)\n"
+                     f"     - Travel time: {total_distance/effective_speed_ms:.1f}s at {effective_speed_ms} m/s\n"
+                     f"     - Waypoint count: {waypoint_count} waypoints\n"
+                     f"   • Action time: {total_action_time:.1f} seconds ({total_action_time/60:.1f} minutes)\n"
+                     f"   • Total mission time: {total_minutes}m {total_seconds}s\n"
+                     f"   • Estimated battery usage: ~{min(battery_percentage, 100):.0f}% (DJI Air 3S)")
+            
+            self.mission_estimate = (total_distance, int(total_mission_time), round(min(battery_percentage, 100)))
             
         except Exception as e:
-            print(f"⚠️  Could not estimate mission time: {str(e)}")
+            self.log(f"⚠️  Could not estimate mission time: {str(e)}")
     
-    def _calculate_distance(self, point1, point2):
+    def _calculate_distance(self, point1, point2, _sin=math.sin, _cos=math.cos, _atan2=math.atan2,
+                            _sqrt=math.sqrt, _radians=math.radians, _hypot=math.hypot):
         """Calculate distance between two GPS coordinates in meters"""
+        # The math functions are bound as defaults so each call uses fast local lookups
         try:
-            from math import sqrt, atan2, cos, sin, radians
-            
             # Haversine formula for great-circle distance
             R = 6371000  # Earth's radius in meters
             
             lat1, lon1, alt1 = point1
             lat2, lon2, alt2 = point2
             
-            lat1_rad = radians(lat1)
-            lat2_rad = radians(lat2)
-            delta_lat = radians(lat2 - lat1)
-            delta_lon = radians(lon2 - lon1)
+            lat1_rad = _radians(lat1)
+            lat2_rad = _radians(lat2)
+            delta_lat = _radians(lat2 - lat1)
+            delta_lon = _radians(lon2 - lon1)
             
-            a = (sin(delta_lat/2)**2 + 
-                 cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon/2)**2)
-            c = 2 * atan2(sqrt(a), sqrt(1-a))
+            a = (_sin(delta_lat/2)**2 + 
+                 _cos(lat1_rad) * _cos(lat2_rad) * _sin(delta_lon/2)**2)
+            c = 2 * _atan2(_sqrt(a), _sqrt(1-a))
             
             distance = R * c
             
             # Add altitude difference
-            alt_diff = abs(alt2 - alt1)
-            total_distance = sqrt(distance**2 + alt_diff**2)
+            total_distance = _hypot(distance, alt2 - alt1)
             
             return total_distance
             
         except Exception as e:
-            print(f"⚠️  Distance calculation error: {str(e)}")
+            # A bad segment counts as zero distance instead of aborting the estimate
+            self.log(f"⚠️  Distance calculation error: {str(e)}")
             return 0
     
     def _create_output_kmz(self, output_dir, output_filename=None):
         """Create new KMZ file with processed WPML"""
-        print("📦 Step 6: Creating output KMZ...")
+        self.log("📦 Step 4: Creating output KMZ...")
         
         try:
             # Determine output path
@@ -455,42 +470,115 @@ class KMZProcessor:
             
             # Check if file already exists
             if os.path.exists(output_path):
-                print(f"⚠️  WARNING: File already exists: {output_filename}")
-                print("   The existing file will be overwritten!")
+                self.log(f"⚠️  WARNING: File already exists: {output_filename}")
+                self.log("   The existing file will be overwritten!")
                 # Continue with overwrite (GUI already handled confirmation)
             
-            # Create new ZIP (KMZ) file
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Add all files from work directory
-                for root, dirs, files in os.walk(self.work_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, self.work_dir)
-                        zipf.write(file_path, arcname)
-            
-            print(f"✅ Output KMZ created: {output_path}")
-            print(f"📊 File size: {os.path.getsize(output_path):,} bytes")
+            # Write to a temporary name first so the input KMZ can be overwritten safely
+            partial_path = output_path + ".part"
+            try:
+                with zipfile.ZipFile(self.original_kmz_path, 'r') as zin:
+                    members = zin.infolist()
+                    
+                    # Only archives near the 2 GiB / 65535 member limits need Zip64 records
+                    total_size = sum(zinfo.file_size for zinfo in members) + len(self.processed_wpml_bytes or b'')
+                    allow_zip64 = (total_size >= zipfile.ZIP64_LIMIT
+                                   or len(members) >= zipfile.ZIP_FILECOUNT_LIMIT)
+                    
+                    # Small mission-only KMZs skip zlib for everything that is re-encoded
+                    store_only = total_size < self.STORED_ARCHIVE_THRESHOLD
+                    compression = zipfile.ZIP_STORED if store_only else zipfile.ZIP_DEFLATED
+                    
+                    with zipfile.ZipFile(partial_path, 'w', compression, allowZip64=allow_zip64) as zout:
+                        for zinfo in members:
+                            out_info = self._copy_zip_info(zinfo)
+                            # Only waylines.wpml changes; every other member's compressed bytes are
+                            # copied as-is, falling back to a stream copy (media is never re-deflated)
+                            if zinfo.filename == self.waylines_wpml_name and self.processed_wpml_bytes is not None:
+                                zout.writestr(out_info, self.processed_wpml_bytes, compress_type=compression,
+                                              compresslevel=self.WPML_COMPRESSLEVEL)
+                            elif self._copy_raw_member(zin, zout, zinfo):
+                                continue
+                            elif zinfo.is_dir():
+                                zout.writestr(out_info, b'')
+                            else:
+                                if store_only or os.path.splitext(zinfo.filename)[1].lower() in self.INCOMPRESSIBLE_EXTENSIONS:
+                                    out_info.compress_type = zipfile.ZIP_STORED
+                                with zin.open(zinfo) as src, zout.open(out_info, 'w') as dst:
+                                    shutil.copyfileobj(src, dst, self.COPY_BUFFER_SIZE)
+                os.replace(partial_path, output_path)
+            finally:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+            
+            self.log(f"✅ Output KMZ created: {output_path}")
+            self.log(f"📊 File size: {os.path.getsize(output_path):,} bytes")
             
             return output_path
             
         except Exception as e:
-            print(f"❌ Failed to create output KMZ: {str(e)}")
+            self.log(f"❌ Failed to create output KMZ: {str(e)}")
             return None
     
-    def _cleanup(self):
-        """Clean up temporary files"""
-        print("🧹 Step 7: Cleaning up...")
+    def _copy_raw_member(self, zin, zout, zinfo):
+        """Copy a member's local header and compressed data without inflating it
         
-        try:
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-                print("✅ Temporary files cleaned up")
-        except Exception as e:
-            print(f"⚠️  Warning: Failed to clean up temp files: {str(e)}")
+        Returns False, having written nothing, when the member must go through a normal copy.
+        """
+        # Data descriptors, encryption and Zip64 central records change the entry layout;
+        # those rare members are left to zipfile
+        if zinfo.flag_bits & 0x09 or self._has_zip64_extra(zinfo.extra):
+            return False
+        
+        zin.fp.seek(zinfo.header_offset)
+        header = zin.fp.read(zipfile.sizeFileHeader)
+        if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+            return False
+        name_extra = zin.fp.read(sum(struct.unpack('<HH', header[26:30])))
+        
+        # zipfile has no public raw-copy API: append at the current end of the archive
+        # and register the entry so the central directory is written for it on close
+        out_info = copy.copy(zinfo)
+        zout.fp.seek(zout.start_dir)
+        out_info.header_offset = zout.fp.tell()
+        zout.fp.write(header)
+        zout.fp.write(name_extra)
+        remaining = zinfo.compress_size
+        while remaining:
+            chunk = zin.fp.read(min(remaining, self.COPY_BUFFER_SIZE))
+            if not chunk:
+                raise EOFError(f"Truncated member in input KMZ: {zinfo.filename}")
+            zout.fp.write(chunk)
+            remaining -= len(chunk)
+        zout.start_dir = zout.fp.tell()
+        zout.filelist.append(out_info)
+        zout.NameToInfo[out_info.filename] = out_info
+        zout._didModify = True
+        return True
+    
+    def _has_zip64_extra(self, extra):
+        """Check whether a central directory extra field holds a Zip64 record"""
+        offset = 0
+        while offset + 4 <= len(extra):
+            header_id, size = struct.unpack_from('<HH', extra, offset)
+            if header_id == 0x0001:
+                return True
+            offset += 4 + size
+        return False
+    
+    def _copy_zip_info(self, zinfo):
+        """Create a fresh ZipInfo for writing, keeping the source member's metadata"""
+        out_info = zipfile.ZipInfo(zinfo.filename, date_time=zinfo.date_time)
+        out_info.compress_type = zinfo.compress_type
+        out_info.file_size = zinfo.file_size  # lets zipfile decide on Zip64 up front
+        out_info.external_attr = zinfo.external_attr
+        out_info.comment = zinfo.comment
+        return out_info
 
 def main():
     """Command line interface"""
-    import sys
+    # Show the processor's progress messages on the console
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     
     if len(sys.argv) != 2:
         print("Usage: python kmz_processor.py <input.kmz>")
@@ -504,12 +592,12 @@ def main():
         sys.exit(1)
     
     processor = KMZProcessor()
-    output_path = processor.process_kmz(input_kmz)
+    result = processor.process_kmz(input_kmz)
     
-    if output_path:
+    if result:
         print(f"\n🎉 SUCCESS!")
         print(f"📁 Input:  {input_kmz}")
-        print(f"📁 Output: {output_path}")
+        print(f"📁 Output: {result.output_path}")
         print(f"🔗 All waypoints now have hover + photo actions!")
     else:
         print(f"\n❌ FAILED to process {input_kmz}")
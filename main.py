@@ -6,10 +6,62 @@ A desktop application for editing WPML files from Dronelink for drone navigation
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import xml.etree.ElementTree as ET
-from pathlib import Path
 import json
 import os
+import threading
+
+# WPML waypoints are KML Placemarks; DJI's own elements live in the wpml namespace,
+# whose URI ends in a format version (1.0.2, 1.0.6, ...), so it is matched by prefix
+KML_NS = "http://www.opengis.net/kml/2.2"
+WPML_NS_PREFIX = "http://www.dji.com/wpmz/"
+WAYPOINT_TAG = f"{{{KML_NS}}}Placemark"
+COORDINATES_PATH = f"{{{KML_NS}}}Point/{{{KML_NS}}}coordinates"
+
+# Prefer lxml (C parser, compiled XPath); fall back to the standard library
+try:
+    from lxml import etree as ET
+    _XML_PARSER = ET.XMLParser(huge_tree=True)
+    _find_waypoints = ET.XPath(".//kml:Placemark", namespaces={"kml": KML_NS})
+    _find_actions = ET.XPath(f".//*[local-name()='action' and starts-with(namespace-uri(), '{WPML_NS_PREFIX}')]")
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _XML_PARSER = None
+    
+    def _find_waypoints(elem):
+        return elem.findall(f".//{WAYPOINT_TAG}")
+    
+    def _find_actions(elem):
+        return [e for e in elem.iter() if e is not elem and _is_wpml_tag(e.tag, "action")]
+
+
+def _is_wpml_tag(tag, name):
+    """Check whether an element tag is wpml:<name> (comments and PIs have non-string tags)"""
+    return (isinstance(tag, str) and tag.endswith("}" + name)
+            and tag.startswith("{" + WPML_NS_PREFIX))
+
+
+def _wpml_child_text(elem, name, default):
+    """Text of elem's first wpml:<name> child, or default"""
+    for child in elem:
+        if _is_wpml_tag(child.tag, name):
+            return (child.text or "").strip() or default
+    return default
+
+
+def _count_waypoint_actions(root):
+    """Count the actions inside every waypoint with one walk over the document"""
+    counts = {}
+    stack = [(root, ())]
+    while stack:
+        elem, enclosing = stack.pop()
+        if _is_wpml_tag(elem.tag, "action"):
+            for wp in enclosing:
+                counts[wp] += 1
+        elif elem.tag == WAYPOINT_TAG:
+            counts[elem] = 0
+            enclosing += (elem,)
+        stack.extend((child, enclosing) for child in elem)
+    return counts
 
 
 class DroneWPMLEditor:
@@ -21,7 +73,17 @@ class DroneWPMLEditor:
         
         # Current file path
         self.current_file = None
+        self.current_name = None  # os.path.basename(current_file), computed once
         self.wpml_data = None
+        self._waypoints = []
+        self._waypoint_rows = []
+        # True while a file is being parsed on the worker thread
+        self._loading = False
+        # Set when the mission fields are edited; a clean file is not rewritten on Save
+        self._dirty = False
+        
+        # The Actions tab is only filled once it is shown for the loaded file
+        self._actions_loaded = False
         
         # Create the main interface
         self.create_widgets()
@@ -45,7 +107,8 @@ class DroneWPMLEditor:
         file_frame = ttk.LabelFrame(main_frame, text="File Operations", padding="5")
         file_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        ttk.Button(file_frame, text="Open WPML File", command=self.open_file).grid(row=0, column=0, padx=(0, 5))
+        self.open_button = ttk.Button(file_frame, text="Open WPML File", command=self.open_file)
+        self.open_button.grid(row=0, column=0, padx=(0, 5))
         ttk.Button(file_frame, text="Save WPML File", command=self.save_file).grid(row=0, column=1, padx=(0, 5))
         ttk.Button(file_frame, text="Save As...", command=self.save_as_file).grid(row=0, column=2, padx=(0, 5))
         
@@ -81,6 +144,13 @@ class DroneWPMLEditor:
         # Settings tab
         self.create_settings_tab()
         
+        # Track unsaved edits to the mission fields
+        self.mission_name_var.trace_add("write", self._mark_dirty)
+        self.mission_desc_var.trace_add("write", self._mark_dirty)
+        
+        # Fill the Actions tab on demand
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("Ready")
@@ -156,6 +226,7 @@ class DroneWPMLEditor:
         """Create the actions editing tab"""
         actions_frame = ttk.Frame(self.notebook)
         self.notebook.add(actions_frame, text="Actions")
+        self.actions_frame = actions_frame
         
         # Actions list
         list_frame = ttk.Frame(actions_frame)
@@ -220,84 +291,160 @@ class DroneWPMLEditor:
         
     def open_file(self):
         """Open a WPML file"""
+        if self._loading:
+            return
+            
         file_path = filedialog.askopenfilename(
             title="Open WPML File",
             filetypes=[("WPML files", "*.wpml"), ("XML files", "*.xml"), ("All files", "*.*")]
         )
         
         if file_path:
-            try:
-                self.load_wpml_file(file_path)
-                self.current_file = file_path
-                self.file_info_label.config(text=f"Loaded: {Path(file_path).name}")
-                self.status_var.set(f"Opened {Path(file_path).name}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to open file: {str(e)}")
+            # Parse on a worker thread so the window stays responsive
+            self._loading = True
+            self.open_button.config(state="disabled")
+            self.status_var.set(f"Loading {os.path.basename(file_path)}...")
+            threading.Thread(target=self._open_file_thread, args=(file_path,), daemon=True).start()
+            
+    def _open_file_thread(self, file_path):
+        """Parse a WPML file off the Tk thread, then finish on the Tk thread"""
+        try:
+            loaded = self._parse_wpml_file(file_path)
+            self.root.after(0, self._open_file_complete, file_path, loaded, None)
+        except Exception as e:
+            self.root.after(0, self._open_file_complete, file_path, None, e)
+            
+    def _open_file_complete(self, file_path, loaded, error):
+        """Show a file parsed by _open_file_thread"""
+        self._loading = False
+        self.open_button.config(state="normal")
+        
+        try:
+            if error is not None:
+                raise error
+            self._show_wpml(*loaded)
+            self.current_file = file_path
+            self.current_name = os.path.basename(file_path)
+            self.file_info_label.config(text=f"Loaded: {self.current_name}")
+            self.status_var.set(f"Opened {self.current_name}")
+        except Exception as e:
+            self.status_var.set("Ready")
+            messagebox.showerror("Error", f"Failed to open file: {str(e)}")
                 
-    def load_wpml_file(self, file_path):
-        """Load and parse WPML file"""
-        tree = ET.parse(file_path)
+    def _parse_wpml_file(self, file_path):
+        """Parse a WPML file and prepare its table rows (no Tk calls, safe on any thread)"""
+        tree = ET.parse(file_path, parser=_XML_PARSER)
         root = tree.getroot()
         
-        # Store the parsed data
-        self.wpml_data = root
+        # The waypoint list is shared by both tabs
+        waypoints = list(_find_waypoints(root))
         
         # Extract mission info
         mission_name = root.find(".//mission/name")
-        if mission_name is not None:
-            self.mission_name_var.set(mission_name.text or "")
-            
         mission_desc = root.find(".//mission/description")
-        if mission_desc is not None:
-            self.mission_desc_var.set(mission_desc.text or "")
+        
+        return root, waypoints, self._build_waypoint_rows(root, waypoints), mission_name, mission_desc
+        
+    def _show_wpml(self, root, waypoints, waypoint_rows, mission_name, mission_desc):
+        """Store parsed WPML data and show it in the window"""
+        self.wpml_data = root
+        self._waypoints = waypoints
+        self._waypoint_rows = waypoint_rows
+        
+        # Only touch the Tcl variables (and fire their traces) when the text changes
+        for elem, var in ((mission_name, self.mission_name_var), (mission_desc, self.mission_desc_var)):
+            if elem is not None and var.get() != (elem.text or ""):
+                var.set(elem.text or "")
         
         # Load waypoints
         self.load_waypoints()
         
-        # Load actions
-        self.load_actions()
+        # Actions are loaded when the Actions tab is shown
+        self._actions_loaded = False
+        self._load_actions_if_visible()
+        
+        # Filling in the fields above is not an edit
+        self._dirty = False
+        
+    def _mark_dirty(self, *args):
+        """Remember that the loaded mission has unsaved changes"""
+        self._dirty = True
+        
+    def _on_tab_changed(self, event):
+        """Load actions the first time the Actions tab is shown"""
+        self._load_actions_if_visible()
+        
+    def _load_actions_if_visible(self):
+        """Fill the Actions tab if it is selected and not yet loaded"""
+        if (self.wpml_data is not None and not self._actions_loaded
+                and self.notebook.select() == str(self.actions_frame)):
+            self.load_actions()
+            self._actions_loaded = True
         
     def load_waypoints(self):
         """Load waypoints from WPML data"""
-        # Clear existing waypoints
-        for item in self.waypoints_tree.get_children():
-            self.waypoints_tree.delete(item)
+        # Clear existing waypoints in a single Tcl call
+        children = self.waypoints_tree.get_children()
+        if children:
+            self.waypoints_tree.delete(*children)
             
-        # Find waypoints in WPML
-        waypoints = self.wpml_data.findall(".//waypoint")
+        self._bulk_insert(self.waypoints_tree, self._waypoint_rows)
         
+    def _build_waypoint_rows(self, root, waypoints):
+        """Build the Waypoints table rows (no Tk calls)"""
+        # Action counts for all waypoints come from a single walk, not one search per waypoint
+        action_counts = _count_waypoint_actions(root)
+        
+        rows = []
         for i, wp in enumerate(waypoints, 1):
-            lat = wp.get("lat", "0")
-            lon = wp.get("lon", "0")
-            alt = wp.get("alt", "0")
-            speed = wp.get("speed", "0")
-            
-            # Count actions for this waypoint
-            actions_count = len(wp.findall(".//action"))
-            
-            self.waypoints_tree.insert("", "end", values=(
-                str(i), lat, lon, alt, speed, str(actions_count)
-            ))
+            # KML coordinates are "lon,lat[,alt]"
+            lon, _, rest = (wp.findtext(COORDINATES_PATH) or "").strip().partition(",")
+            lat = rest.partition(",")[0]
+            rows.append((str(i), lat or "0", lon or "0",
+                         _wpml_child_text(wp, "executeHeight", "0"),
+                         _wpml_child_text(wp, "waypointSpeed", "0"),
+                         str(action_counts.get(wp, 0))))
+        return rows
             
     def load_actions(self):
         """Load actions from WPML data"""
-        # Clear existing actions
-        for item in self.actions_tree.get_children():
-            self.actions_tree.delete(item)
+        # Clear existing actions in a single Tcl call
+        children = self.actions_tree.get_children()
+        if children:
+            self.actions_tree.delete(*children)
             
-        # Find actions in WPML
-        waypoints = self.wpml_data.findall(".//waypoint")
-        
-        for wp_idx, wp in enumerate(waypoints, 1):
-            actions = wp.findall(".//action")
-            for action in actions:
-                action_type = action.get("type", "Unknown")
-                params = action.get("params", "")
-                delay = action.get("delay", "0")
+        rows = [(str(wp_idx), _wpml_child_text(action, "actionActuatorFunc", "Unknown"),
+                 self._action_params(action), "0")
+                for wp_idx, wp in enumerate(self._waypoints, 1)
+                for action in _find_actions(wp)]
                 
-                self.actions_tree.insert("", "end", values=(
-                    str(wp_idx), action_type, params, delay
-                ))
+        self._bulk_insert(self.actions_tree, rows)
+        
+    def _action_params(self, action):
+        """Summarize an action's wpml:actionActuatorFuncParam children as name=value pairs"""
+        for child in action:
+            if _is_wpml_tag(child.tag, "actionActuatorFuncParam"):
+                return ", ".join(f"{param.tag.rpartition('}')[2]}={(param.text or '').strip()}"
+                                 for param in child
+                                 if isinstance(param.tag, str) and (param.text or "").strip())
+        return ""
+        
+    def _bulk_insert(self, tree, rows):
+        """Insert rows into a Treeview while it is unmapped, so Tk lays it out once"""
+        grid_info = tree.grid_info()
+        yscroll = tree.cget("yscrollcommand")
+        xscroll = tree.cget("xscrollcommand")
+        
+        # Detach the tree and its scrollbar callbacks for the duration of the insert
+        tree.configure(yscrollcommand="", xscrollcommand="")
+        tree.grid_forget()
+        try:
+            # Explicit iids spare Tk from generating one per row
+            for iid, values in enumerate(rows, 1):
+                tree.insert("", "end", iid=str(iid), values=values)
+        finally:
+            tree.grid(**grid_info)
+            tree.configure(yscrollcommand=yscroll, xscrollcommand=xscroll)
                 
     def save_file(self):
         """Save the current WPML file"""
@@ -317,7 +464,8 @@ class DroneWPMLEditor:
         if file_path:
             self.save_wpml_file(file_path)
             self.current_file = file_path
-            self.file_info_label.config(text=f"Saved: {Path(file_path).name}")
+            self.current_name = os.path.basename(file_path)
+            self.file_info_label.config(text=f"Saved: {self.current_name}")
             
     def save_wpml_file(self, file_path):
         """Save WPML data to file"""
@@ -325,6 +473,13 @@ class DroneWPMLEditor:
             messagebox.showwarning("Warning", "No data to save")
             return
             
+        name = self.current_name if file_path == self.current_file else os.path.basename(file_path)
+        
+        # Nothing to serialize if the file on disk already matches
+        if not self._dirty and file_path == self.current_file:
+            self.status_var.set(f"No changes to save in {name}")
+            return
+            
         try:
             # Update mission info
             mission = self.wpml_data.find(".//mission")
@@ -343,10 +498,12 @@ class DroneWPMLEditor:
                     desc_elem = ET.SubElement(mission, "description")
                     desc_elem.text = self.mission_desc_var.get()
             
-            # Write to file
+            # Write to file through a large buffer so the serializer's small writes are batched
             tree = ET.ElementTree(self.wpml_data)
-            tree.write(file_path, encoding="utf-8", xml_declaration=True)
-            self.status_var.set(f"Saved {Path(file_path).name}")
+            with open(file_path, "wb", buffering=1 << 20) as f:
+                tree.write(f, encoding="utf-8", xml_declaration=True)
+            self._dirty = False
+            self.status_var.set(f"Saved {name}")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {str(e)}")
@@ -433,9 +590,10 @@ def main():
     
     # Center the window
     root.update_idletasks()
-    x = (root.winfo_screenwidth() // 2) - (root.winfo_width() // 2)
-    y = (root.winfo_screenheight() // 2) - (root.winfo_height() // 2)
-    root.geometry(f"+{x}+{y}")
+    # Read each dimension once; every winfo call is a Tcl round trip
+    screen_w, screen_h = root.winfo_screenwidth(), root.winfo_screenheight()
+    win_w, win_h = root.winfo_width(), root.winfo_height()
+    root.geometry(f"+{(screen_w - win_w) // 2}+{(screen_h - win_h) // 2}")
     
     root.mainloop()
 
@@ -5,9 +5,33 @@ Just run this file directly in your IDE or double-click it
 """
 
 import os
+import re
+import sys
+from kmz_processor import KMZProcessor
 
-def check_wpml_file(file_path):
-    """Check if a WPML file is compatible - returns True/False"""
+# Only the start of the file is read to sniff the XML declaration and namespaces
+SNIFF_SIZE = 4096
+
+# Namespace URIs every KML/WPML document declares on its root element
+KML_NS = b'http://www.opengis.net/kml'
+WPML_NS = b'http://www.dji.com/wpmz/'
+
+# The rest of the file is scanned in chunks of this size
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# Waypoints, insertion points and existing actions, matched as the exact text
+# KMZProcessor looks for so the verdict predicts what the processor will do
+_MARKERS_RE = re.compile(rb'(<Placemark>)|(' + re.escape(KMZProcessor.INSERTION_MARKER) + rb')|<wpml:action>')
+
+# Bytes carried over between chunks so a marker split across them is still found
+_MARKER_OVERLAP = len(KMZProcessor.INSERTION_MARKER) - 1
+
+def check_wpml_file(file_path, full_scan=False):
+    """Check if a WPML file is compatible - returns True/False
+    
+    The scan stops as soon as a waypoint and an insertion point have been seen.
+    With full_scan=True the whole file is read and the counts are reported.
+    """
     
     # Get the directory where this script is located
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,39 +55,55 @@ def check_wpml_file(file_path):
     
     # Check 3: Quick content check
     try:
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with open(full_path, 'rb') as f:
+            head = f.read(SNIFF_SIZE)
             
-        # Basic checks
-        if '<?xml' not in content:
-            print("❌ Not XML")
-            return False
+            # Basic checks
+            if b'<?xml' not in head:
+                print("❌ Not XML")
+                return False
+                
+            if KML_NS not in head:
+                print("❌ Not KML")
+                return False
+                
+            if WPML_NS not in head:
+                print("❌ Not WPML")
+                return False
+                
+            print("✅ Valid XML/KML/WPML")
             
-        if 'kml' not in content.lower():
-            print("❌ Not KML")
-            return False
-            
-        if 'wpml' not in content.lower():
-            print("❌ Not WPML")
-            return False
-            
-        print("✅ Valid XML/KML/WPML")
-        
-        # Count waypoints
-        waypoints = content.count('<Placemark>')
-        print(f"✅ Waypoints: {waypoints}")
+            # Count waypoints, insertion points and actions in one chunked pass
+            waypoints = insertion_points = actions = 0
+            f.seek(0)
+            tail = b''
+            for chunk in iter(lambda: f.read(SCAN_CHUNK_SIZE), b''):
+                buf = tail + chunk
+                for match in _MARKERS_RE.finditer(buf):
+                    # Matches that end inside the carried-over tail were counted last chunk
+                    if match.end() <= len(tail):
+                        continue
+                    if match.group(1):
+                        waypoints += 1
+                    elif match.group(2):
+                        insertion_points += 1
+                    else:
+                        actions += 1
+                # A waypoint and an insertion point answer the quick check
+                if not full_scan and waypoints and insertion_points:
+                    break
+                tail = buf[-_MARKER_OVERLAP:]
         
-        # Count insertion points
-        insertion_points = content.count('<wpml:useStraightLine>0</wpml:useStraightLine>')
-        print(f"✅ Insertion points: {insertion_points}")
+        if full_scan:
+            print(f"✅ Waypoints: {waypoints}")
+            print(f"✅ Insertion points: {insertion_points}")
         
         if insertion_points == 0:
             print("❌ No insertion points - not compatible")
             return False
             
-        # Count existing actions
-        actions = content.count('<wpml:action>')
-        if actions > 0:
+        # Report existing actions
+        if full_scan and actions > 0:
             print(f"⚠️  Existing actions: {actions}")
         
         print("✅ COMPATIBLE with Drone WPML Editor!")
@@ -78,17 +118,20 @@ if __name__ == "__main__":
     print("WPML File Compatibility Checker")
     print("=" * 40)
     
+    # Pass --full to scan whole files and report waypoint/action counts
+    full_scan = "--full" in sys.argv[1:]
+    
     # Check main waylines file
     print("\n1. Checking waylines.wpml:")
-    result1 = check_wpml_file("waylines.wpml")
+    result1 = check_wpml_file("waylines.wpml", full_scan)
     
     # Check hover file
     print("\n2. Checking working_hover.wpml:")
-    result2 = check_wpml_file("working_hover.wpml")
+    result2 = check_wpml_file("working_hover.wpml", full_scan)
     
     # Check original file
     print("\n3. Checking original/hover/waylines.wpml:")
-    result3 = check_wpml_file("original/hover/waylines.wpml")
+    result3 = check_wpml_file("original/hover/waylines.wpml", full_scan)
     
     print("\n" + "=" * 40)
     print("SUMMARY:")
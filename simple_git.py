@@ -6,16 +6,77 @@ Walks you through each step automatically
 
 import subprocess
 import os
+import re
 import sys
+import tempfile
 
-def run_command(cmd):
-    """Run a command safely"""
+def run_command(argv):
+    """Run a command safely (argv list, no shell in between)"""
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=15)
+        result = subprocess.run(argv, capture_output=True, text=True, timeout=15)
         return result.returncode == 0, result.stdout, result.stderr
     except:
         return False, "", "Command failed"
 
+def start_command(argv, env=None, interactive=False):
+    """Start a command without waiting for it (interactive keeps the terminal's stdin)"""
+    # Output goes to temporary files, not pipes: an ssh ControlMaster started by a
+    # push outlives git and would keep a pipe open until ControlPersist runs out
+    stdout, stderr = tempfile.TemporaryFile("w+"), tempfile.TemporaryFile("w+")
+    try:
+        process = subprocess.Popen(argv, stdin=None if interactive else subprocess.DEVNULL,
+                                   stdout=stdout, stderr=stderr, env=env)
+    except OSError:
+        stdout.close()
+        stderr.close()
+        return None
+    return process, stdout, stderr
+
+def finish_command(command, timeout=15):
+    """Wait for a command started by start_command and collect its result"""
+    if command is None:
+        return False, "", "Command failed"
+    process, stdout, stderr = command
+    with stdout, stderr:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            return False, "", "Command timed out"
+        stdout.seek(0)
+        stderr.seek(0)
+        return process.returncode == 0, stdout.read(), stderr.read()
+
+def ssh_supports_multiplexing():
+    """True if the ssh on PATH can share connections (OpenSSH 6.7+ for %C, not on Windows)"""
+    # The socket needs a private directory; Windows OpenSSH has no ControlMaster
+    if os.name == "nt" or not os.path.isdir(os.path.expanduser("~/.ssh")):
+        return False
+    success, stdout, stderr = run_command(["ssh", "-V"])
+    version = re.match(r"OpenSSH_(\d+)\.(\d+)", stderr or stdout)
+    return success and version is not None and tuple(map(int, version.groups())) >= (6, 7)
+
+def custom_ssh_configured():
+    """True if the user has set their own SSH command for git"""
+    return ("GIT_SSH_COMMAND" in os.environ or "GIT_SSH" in os.environ
+            or run_command(["git", "config", "--get", "core.sshCommand"])[0])
+
+def push_env(background):
+    """Environment for git push (only used when no custom SSH command is configured)"""
+    ssh = ["ssh"]
+    if background:
+        # Fail instead of asking for a passphrase or host key while input() owns the terminal
+        ssh.append("-o BatchMode=yes")
+    # Share one connection across pushes; LogLevel=ERROR keeps the master quiet
+    if ssh_supports_multiplexing():
+        ssh.append("-o ControlMaster=auto -o 'ControlPath=~/.ssh/cm-%C' -o ControlPersist=10m -o LogLevel=ERROR")
+    env = dict(os.environ, GIT_SSH_COMMAND=" ".join(ssh))
+    if background:
+        # Same for git's own username/password prompts; stored credentials still work
+        env["GIT_TERMINAL_PROMPT"] = "0"
+    return env
+
 def print_step(step_num, title):
     """Print a step header"""
     print(f"\n{'='*50}")
@@ -40,7 +101,8 @@ def main():
     # Step 1: Check if Git repository
     print_step(1, "Checking Git Repository")
     
-    success, stdout, stderr = run_command("git status --porcelain")
+    # One status call both confirms the repository and lists the changes
+    success, stdout, stderr = run_command(["git", "status", "--porcelain=v1"])
     if not success:
         print("❌ This is not a Git repository!")
         print("Make sure you're in the right folder.")
@@ -50,8 +112,7 @@ def main():
     print("✅ Git repository found")
     
     # Show current status
-    success, stdout, stderr = run_command("git status --short")
-    if success and stdout.strip():
+    if stdout.strip():
         print(f"\n📋 Files to be updated:")
         print(stdout)
     else:
@@ -64,7 +125,7 @@ def main():
     # Step 2: Add files
     print_step(2, "Adding Files to Git")
     
-    success, stdout, stderr = run_command("git add .")
+    success, stdout, stderr = run_command(["git", "add", "."])
     if not success:
         print(f"❌ Failed to add files: {stderr}")
         wait_for_user()
@@ -93,20 +154,39 @@ def main():
         commit_message = suggested_message
         print(f"Using suggested message: {commit_message}")
     
-    success, stdout, stderr = run_command(f'git commit -m "{commit_message}"')
+    success, stdout, stderr = run_command(["git", "commit", "-m", commit_message])
     if not success:
         print(f"❌ Failed to commit: {stderr}")
         wait_for_user()
         return
     
     print("✅ Changes committed successfully")
+    
+    # Start the push now so the network wait overlaps the pause below. It only
+    # runs in the background when it cannot prompt, since input() owns the terminal.
+    push_argv = ["git", "push", "origin", "main"]
+    custom_ssh = custom_ssh_configured()
+    push_process = None
+    if not custom_ssh:
+        push_process = start_command(push_argv, env=push_env(background=True))
+    if push_process is not None:
+        print("📤 Push started in background")
     wait_for_user()
     
     # Step 4: Push to GitHub
     print_step(4, "Pushing to GitHub")
     
     print("Pushing to GitHub...")
-    success, stdout, stderr = run_command("git push origin main")
+    success = False
+    if push_process is not None:
+        success, stdout, stderr = finish_command(push_process)
+        if not success:
+            print("🔁 Background push did not go through, trying again here (you may be asked to sign in)...")
+    if not success:
+        env = None if custom_ssh else push_env(background=False)
+        # No timeout: this push may be waiting for the user to type credentials
+        success, stdout, stderr = finish_command(start_command(push_argv, env=env, interactive=True),
+                                                 timeout=None)
     if not success:
         print(f"❌ Failed to push: {stderr}")
         print("\n💡 This might be an authentication issue.")